@@ -3,10 +3,36 @@ This module contains one class, Board, which creates and updates the UI.
 '''
 import turtle
 import time
+import math
+import functools
 from constants import SIZE, EMPTY, VALID_PIECE_SELECTED, \
-    BLACK, RED, NEW_TURN
+    BLACK, RED, NEW_TURN, CHECK_MULTIPLE_JUMPS, MOVE_COMPLETE
 from cell import Cell
 
+
+def batched(method):
+    '''
+        Function -- batched
+            Decorates a Board drawing method so that the screen is updated
+            once when it returns. Nested batched calls leave the update to the
+            outermost one.
+        Parameters:
+            method -- the Board method to decorate
+        Returns:
+            The decorated method
+    '''
+    @functools.wraps(method)
+    def run_batched(self, *args):
+        self.batch_depth += 1
+        try:
+            return method(self, *args)
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                self.screen.update()
+    return run_batched
+
+
 class Board:
     '''
         Class -- Board
@@ -15,16 +41,31 @@ class Board:
             self -- the current Board object
             high_bound -- the top/right edge of the board in pixels
             low_bound -- the bottom/left edge of the board in pixels
+            centers -- the pixel coordinate of the center of each row/col
+            inv_square -- 1 / SQUARE, to convert pixels to cells
             game_state -- a reference to the Game object controlling this game
             graphics -- the Turtle object that
+            screen -- the turtle Screen, redrawn only when update() is called
+            piece_ids -- the stamp ids of the piece drawn on each cell, keyed
+            by location
+            piece_states -- the (color, is_king) of the piece drawn on each
+            cell, keyed by location
+            highlight_ids -- the stamp ids of the highlighted cell outlines
+            batch_depth -- how many batched drawing methods are running
+            step_handlers -- the method make_move uses for each turn step
+            pending_ai -- the location chosen by the AI, waiting to be shown
+            ai_deadline -- the time.monotonic() value at which to show it
         Methods:
-            No methods used by other classes.
+            run -- runs the UI event loop
     '''
     SQUARE = 50
     CELL_COLORS = ("light gray", "white")
     PIECE_COLORS = ("black", "firebrick")
     RADIUS = 24
     KING_RADIUS = 16
+    # Milliseconds before an AI move, and before each further AI jump, is shown
+    AI_DELAY = 1000
+    AI_JUMP_DELAY = 2000
 
     def __init__(self, game_ref):
         '''
@@ -41,13 +82,39 @@ class Board:
 
         self.high_bound = self.SQUARE * SIZE/2
         self.low_bound = 0 - self.high_bound
+        self.inv_square = 1.0 / self.SQUARE
+        # The pixel coordinate of the center of each row/col
+        self.centers = tuple(self.low_bound + self.SQUARE * i +
+                             self.SQUARE / 2 for i in range(SIZE))
         self.game_state = game_ref
 
+        # Nothing is drawn on screen until update() is called
+        self.screen = turtle.Screen()
+        self.screen.tracer(0)
+        self.register_shapes()
+
         # Create the Turtle to draw the board
         self.graphics = turtle.Turtle()
         self.graphics.penup()
         self.graphics.hideturtle()
 
+        # The stamp ids and (color, is_king) of the piece drawn on each
+        # cell, keyed by location, and the stamp ids of the highlighted cell
+        # outlines
+        self.piece_ids = {}
+        self.piece_states = {}
+        self.highlight_ids = []
+        self.batch_depth = 0
+
+        # How make_move updates the board for each step of a turn
+        self.step_handlers = {VALID_PIECE_SELECTED: self.show_targets,
+                              CHECK_MULTIPLE_JUMPS: self.show_move,
+                              MOVE_COMPLETE: self.show_move}
+
+        # The AI move being chosen, and when it should be shown
+        self.pending_ai = None
+        self.ai_deadline = 0
+
         # Line color is black, fill color is gray
         self.graphics.color("black", self.CELL_COLORS[0])
 
@@ -59,11 +126,49 @@ class Board:
         self.draw_square(self.SQUARE * SIZE)
         self.draw_cells(self.game_state.status)
 
-        self.screen = turtle.Screen()
         self.screen.onclick(self.board_click)
+
+    def run(self):
+        '''
+            Method -- run
+                Runs the UI event loop. Does not return until the window is
+                closed.
+            Parameters:
+                self -- the current Board object
+        '''
         turtle.done()
 
 
+    def register_shapes(self):
+        '''
+            Method -- register_shapes
+                Registers the cell, piece and king shapes so that each one can
+                be drawn with a single stamp.
+            Parameters:
+                self -- the current Board object
+        '''
+        half = self.SQUARE / 2
+        self.screen.register_shape("cell", ((-half, -half), (half, -half),
+                                            (half, half), (-half, half)))
+        self.screen.register_shape("piece", self.circle_points(self.RADIUS))
+        self.screen.register_shape("king_mark",
+                                   self.circle_points(self.KING_RADIUS))
+
+    def circle_points(self, radius):
+        '''
+            Method -- circle_points
+                Gets the points of a polygon approximating a circle.
+            Parameters:
+                self -- the current Board object
+                radius -- the radius of the circle
+            Returns:
+                A tuple of (x, y) points centered on (0, 0)
+        '''
+        steps = 36
+        return tuple((radius * math.cos(2 * math.pi * i / steps),
+                      radius * math.sin(2 * math.pi * i / steps))
+                     for i in range(steps))
+
     def draw_square(self, width):
         '''
             Method -- draw_square
@@ -78,6 +183,7 @@ class Board:
             self.graphics.left(90)
         self.graphics.penup()
 
+    @batched
     def draw_cells(self, cells):
         '''
             Method -- draw_cells
@@ -89,55 +195,69 @@ class Board:
         # Draw the gray squares
         for row in range(len(cells)):
             for col in range(len(cells[row])):
-                self.draw_cell(cells[row][col])
+                self.draw_background(cells[row][col])
+                self.draw_piece_layer(cells[row][col])
 
-    def draw_cell(self, cell):
+    def draw_background(self, cell):
         '''
-            Method -- draw_cell
-                Draw an individual cell.
+            Method -- draw_background
+                Draw the background of an individual cell. This never
+                changes, so it is only drawn once.
             Parameters:
                 self -- the current Board object
-                cells -- the Cell to draw
+                cell -- the Cell to draw
         '''
-        self.graphics.setposition(self.corner + self.SQUARE * cell.location[1],
-                                  self.corner + self.SQUARE * cell.location[0])
-        # Draw the background
+        center = self.get_center(cell.location[0], cell.location[1])
+        self.graphics.setposition(center[0], center[1])
         color = self.CELL_COLORS[int(cell.playable)]
-        self.graphics.color("dark gray", color)  
-        self.graphics.begin_fill()
-        self.draw_square(self.SQUARE)
-        self.graphics.end_fill()
+        self.graphics.color("dark gray", color)
+        self.graphics.shape("cell")
+        self.graphics.stamp()
 
-        # Draw the piece if necessary
+    def draw_piece_layer(self, cell):
+        '''
+            Method -- draw_piece_layer
+                Redraw the piece on an individual cell, if it has changed
+                since it was last drawn.
+            Parameters:
+                self -- the current Board object
+                cell -- the Cell to draw
+        '''
+        state = EMPTY
         if not cell.is_empty():
-            self.draw_piece(cell)
+            state = (cell.occupant.color, cell.occupant.is_king)
+        if self.piece_states.get(cell.location, EMPTY) == state:
+            return
+        self.piece_states[cell.location] = state
+        for stamp_id in self.piece_ids.pop(cell.location, ()):
+            self.graphics.clearstamp(stamp_id)
+        if state is not EMPTY:
+            center = self.get_center(cell.location[0], cell.location[1])
+            self.graphics.setposition(center[0], center[1])
+            self.piece_ids[cell.location] = self.draw_piece(cell)
 
     def draw_piece(self, cell):
         '''
             Method -- draw_piece
-                Draw a piece.
+                Draw a piece. The turtle must already be at the cell center.
             Parameters:
                 self -- the current Board object
                 cell -- the Cell that contains the Piece
+            Returns:
+                A list of the stamp ids used to draw the piece
         '''
-        center = self.get_center(cell.location[0], cell.location[1], self.RADIUS)
-        self.graphics.setposition(center[0], center[1])
-        self.graphics.pendown()
-        self.graphics.begin_fill()
-        self.graphics.color(self.PIECE_COLORS[cell.occupant.color], self.PIECE_COLORS[cell.occupant.color])
-        self.graphics.circle(self.RADIUS)
-        self.graphics.end_fill()
-        self.graphics.penup()
+        color = self.PIECE_COLORS[cell.occupant.color]
+        self.graphics.color(color, color)
+        self.graphics.shape("piece")
+        stamps = [self.graphics.stamp()]
         if cell.occupant.is_king:
             self.graphics.pencolor("white")
-            center = self.get_center(cell.location[0], cell.location[1],
-                                     self.KING_RADIUS)
-            self.graphics.setposition(center[0], center[1])
-            self.graphics.pendown()
-            self.graphics.circle(self.KING_RADIUS)
-            self.graphics.penup()
+            self.graphics.shape("king_mark")
+            stamps.append(self.graphics.stamp())
+        return stamps
 
 
+    @batched
     def highlight_choice(self, selected_loc, targets):
         '''
             Method -- highlight_choice
@@ -148,47 +268,47 @@ class Board:
                 selected_loc -- the selected cell
                 targets -- a list of cells that the piece could move to
         '''
-        self.graphics.pencolor("deep sky blue")
-        self.graphics.setposition(self.corner + self.SQUARE * selected_loc[1],
-                                  self.corner + self.SQUARE * selected_loc[0])
-        self.draw_square(self.SQUARE)
-        self.graphics.pencolor("red")
+        self.stamp_highlight(selected_loc, "deep sky blue")
         for target in targets:
-            self.graphics.setposition(self.corner + self.SQUARE * \
-                                      target.new_loc[1], self.corner + \
-                                      self.SQUARE * target.new_loc[0])
-            self.draw_square(self.SQUARE)
+            self.stamp_highlight(target.new_loc, "red")
 
+    def stamp_highlight(self, location, color):
+        '''
+            Method -- stamp_highlight
+                Outline a cell in the given color with a single stamp.
+            Parameters:
+                self -- the current Board object
+                location -- the cell to outline
+                color -- the outline color
+        '''
+        center = self.get_center(location[0], location[1])
+        self.graphics.setposition(center[0], center[1])
+        self.graphics.color(color, "")
+        self.graphics.shape("cell")
+        self.highlight_ids.append(self.graphics.stamp())
 
-    def clear_highlights(self, selected_loc, targets):
+    @batched
+    def clear_highlights(self):
         '''
             Method -- clear_highlights
-                Remove the highlights on a cell
+                Remove all the highlighted cell outlines
             Parameters:
                 self -- the current Board object
-                selected_loc -- the originally selected cell
-                targets -- a list of cells that the piece could move to
         '''
-        self.graphics.pencolor("dark gray")
-        self.graphics.setposition(self.corner + self.SQUARE * selected_loc[1], self.corner + self.SQUARE * selected_loc[0])
-        self.draw_square(self.SQUARE)
-        for target in targets:
-            self.graphics.setposition(self.corner + self.SQUARE * target.new_loc[1], self.corner + self.SQUARE * target.new_loc[0])
-            self.draw_square(self.SQUARE)
+        for stamp_id in self.highlight_ids:
+            self.graphics.clearstamp(stamp_id)
+        self.highlight_ids = []
 
-    def get_center(self, row, col, radius):
+    def get_center(self, row, col):
         '''
             Method -- get_center
-                Gets the center point of a cell for drawing pieces
+                Gets the center point of a cell for drawing stamps
             Parameters:
                 self -- the current Board object
                 row -- the cell row
                 col -- the cell column
-                radius -- the radius of the piece
         '''
-        x = col * self.SQUARE +self.SQUARE / 2 + self.low_bound
-        y = row * self.SQUARE + (self.SQUARE / 2) - radius + self.low_bound
-        return (x, y)
+        return (self.centers[col], self.centers[row])
 
     def board_click(self, x, y):
         '''
@@ -199,44 +319,66 @@ class Board:
                 x -- The X coordinate of the click
                 y -- The Y coordinate of the click
         '''
-        if self.is_in_bounds(x, y) and self.game_state.current_turn.player == BLACK:
-            location = (self.get_cell(y), self.get_cell(x))
-            if self.game_state.current_turn.is_valid_turn(location):
+        turn = self.game_state.current_turn
+        if self.is_in_bounds(x, y) and turn.player == BLACK:
+            # Convert the click coordinates to a cell location
+            low_bound = self.low_bound
+            inv_square = self.inv_square
+            location = (int((y - low_bound) * inv_square),
+                        int((x - low_bound) * inv_square))
+            if turn.is_valid_turn(location):
                 self.make_move(location)
-                if self.game_state.current_turn.is_turn_complete():
+                if turn.is_turn_complete():
                     self.next_player() # OR CALL FROM TURN (WHEN COMPLETES)
 
-    # TRY SPLITTIng THIS TO MAkE DELAY - IF HAPPENS BUT ELSE IS DELAYED
+    @batched
     def make_move(self, location):
         '''
             Method -- make_move
-                Updates the board after a click
+                Updates the board after a click, using the handler for the
+                step the turn has reached
             Parameters:
                 self -- the current Board object
                 location -- the clicked cell
         '''
-        if self.game_state.current_turn.step == VALID_PIECE_SELECTED:
-            self.highlight_choice(location, 
-                                 self.game_state.current_turn.possible_targets)
-        else:
-            move = self.game_state.current_turn.final_move
-            self.clear_highlights(move.current_loc, 
-                                 self.game_state.current_turn.possible_targets)
-            self.game_state.update_state(move)
-            self.draw_cell(self.game_state.status[move.current_loc[0]]\
-                                                 [move.current_loc[1]])
-            self.draw_cell(self.game_state.status[move.new_loc[0]]\
-                                                 [move.new_loc[1]])
-            if move.is_capture():
-                self.draw_cell(move.capturing)
-                # Check if there is another capture available from the new cell
-                additional_jumps = self.game_state.get_additional_jump(
-                                        self.game_state.status[move.new_loc[0]]
-                                                              [move.new_loc[1]],
-                                        self.game_state.current_turn.player)
-                if len(additional_jumps) > 0:
-                    self.game_state.extend_turn(additional_jumps)
-                    self.highlight_choice(move.new_loc, additional_jumps)    
+        self.step_handlers[self.game_state.current_turn.step](location)
+
+    def show_targets(self, location):
+        '''
+            Method -- show_targets
+                Highlights the moves for the piece that was just selected
+            Parameters:
+                self -- the current Board object
+                location -- the selected cell
+        '''
+        turn = self.game_state.current_turn
+        self.highlight_choice(location, turn.possible_targets)
+
+    def show_move(self, location):
+        '''
+            Method -- show_move
+                Makes the move that was just chosen and redraws the cells it
+                changed. Highlights any further jumps the piece can make.
+            Parameters:
+                self -- the current Board object
+                location -- the target cell
+        '''
+        game = self.game_state
+        turn = game.current_turn
+        move = turn.final_move
+        self.clear_highlights()
+        game.update_state(move)
+        self.draw_piece_layer(game.cell(move.current_loc[0],
+                                        move.current_loc[1]))
+        new_cell = game.cell(move.new_loc[0], move.new_loc[1])
+        self.draw_piece_layer(new_cell)
+        if move.capture:
+            self.draw_piece_layer(game.status_flat[move.capturing])
+            # Check if there is another capture available from the new cell
+            additional_jumps = game.get_additional_jump(new_cell, turn.player)
+            if len(additional_jumps) > 0:
+                game.extend_turn(additional_jumps)
+                self.highlight_choice(move.new_loc, additional_jumps)
 
     def is_in_bounds(self, x, y):
         '''
@@ -254,19 +396,6 @@ class Board:
             return True
         return False
     
-    def get_cell(self, val):
-        '''
-            Method -- get_cell
-                Converts a click coordinate to a cell location.
-            Parameters:
-                self -- the current Board object
-                val -- the click location (x or y)
-            Returns:
-                The index of the cell that was clicked. Works for row and col.
-        '''
-        scaled = val - self.low_bound
-        return int(scaled // self.SQUARE)
-
     def next_player(self):
         '''
             Method -- next_player
@@ -280,8 +409,7 @@ class Board:
             self.end_game()
             print("GAME OVER")
         elif self.game_state.current_turn.player == RED:
-            self.screen.ontimer(self.ai_move, 1000)
-            #self.ai_move()
+            self.schedule_ai_move(self.AI_DELAY)
 
     def end_game(self):
         '''
@@ -300,21 +428,45 @@ class Board:
         else:
             self.graphics.write("You win", font=style, align="center")
     
-    def ai_move(self):
+    def schedule_ai_move(self, delay):
+        '''
+            Method -- schedule_ai_move
+                Starts choosing the AI move straight away and shows it once
+                the delay has passed. Time spent choosing counts towards the
+                delay.
+            Parameters:
+                self -- the current Board object
+                delay -- the time in milliseconds until the move is shown
+        '''
+        self.ai_deadline = time.monotonic() + delay / 1000
+        self.screen.ontimer(self.compute_ai_move, 0)
+
+    def compute_ai_move(self):
+        '''
+            Method -- compute_ai_move
+                Chooses the AI move and schedules it to be shown.
+            Parameters:
+                self -- the current Board object
+        '''
+        self.pending_ai = self.game_state.current_turn.choose_ai_cell()
+        remaining = self.ai_deadline - time.monotonic()
+        self.screen.ontimer(self.animate_ai_move, max(0, int(remaining * 1000)))
+
+    def animate_ai_move(self):
         '''
-            Method -- ai_move
-                Handles the AI move
+            Method -- animate_ai_move
+                Shows the chosen AI move
             Parameters:
                 self -- the current Board object
         '''
-        location = self.game_state.current_turn.choose_ai_cell()
+        location = self.pending_ai
+        self.pending_ai = None
         self.make_move(location)
         print("AI moved to", location)
         if self.game_state.current_turn.player == RED and \
            not self.game_state.current_turn.is_turn_complete():
             print("b")
-            self.screen.ontimer(self.ai_move, 2000)
-            #self.ai_move()
+            self.schedule_ai_move(self.AI_JUMP_DELAY)
         else:
             print("Black's turn")
-            self.game_state.advance_turn()
\ No newline at end of file
+            self.game_state.advance_turn()
@@ -15,7 +15,6 @@ class Cell:
             empty or a Piece object.
         Methods:
             __init__ -- constructor
-            contains_piece -- checks if this cell contains a Piece
             is_empty -- checks if this cell is empty
             __str__ -- a string representation of the move
     '''
@@ -36,22 +35,6 @@ class Cell:
         self.occupant = occupant
 
 
-    def contains_piece(self, color):
-        '''
-            Method -- contains_piece
-                Checks if the Cell contains a Piece of the given color.
-            Parameters:
-                self -- The current Cell object
-                color -- The piece color, black or red
-            Returns:
-                True if the Cell contains a Piece of the given color, False
-                otherwise.
-        '''
-        if self.is_empty():
-            return False
-        return self.occupant.color == color
-
-
     def is_empty(self):
         '''
             Method -- is_empty
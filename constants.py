@@ -2,18 +2,37 @@
 This file contains constants used by multiple classes.
 '''
 
-# Constants to reflect the state of a cell
+# Constants to reflect the state of a cell. The colors are the ints 0 and 1
+# so that they can index per-color tables (e.g. MAN_CODES); compare them with
+# == or !=, not is. Every Piece.color is one of these two values.
 EMPTY = None
 BLACK = 0 # Black is human
 RED = 1
 
-# Pieces can only move forward until they are kings
+# Pieces can only move forward until they are kings. These are tuples so that
+# every Piece can share them safely.
 BLACK_DIRECTIONS = ((1, 1), (1, -1))
 RED_DIRECTIONS = ((-1, 1), (-1, -1))
 KING_DIRECTIONS = ((1, 1), (-1, -1), (1, -1), (-1, 1))
 
 SIZE = 8
 
+# The captured square of a Move that does not capture
+NO_CAPTURE = -1
+
+# Codes for a square in the game's board array. A square holds a piece if the
+# OCC_BIT is set; the COLOR_BIT is set for red pieces and the KING_BIT for kings
+NO_PIECE = 0
+OCC_BIT = 0b001
+KING_BIT = 0b010
+COLOR_BIT = 0b100
+BLACK_MAN = OCC_BIT
+BLACK_KING = OCC_BIT | KING_BIT
+RED_MAN = OCC_BIT | COLOR_BIT
+RED_KING = OCC_BIT | COLOR_BIT | KING_BIT
+# The code of an uncrowned piece, indexed by color
+MAN_CODES = (BLACK_MAN, RED_MAN)
+
 # Move steps
 NEW_TURN = 0
 VALID_PIECE_SELECTED = 1
@@ -3,15 +3,54 @@ This module contains one class, Game, which represents the game state. It is
 responsible for tracking the locations of each piece, finding valid moves, and
 tracking both players' scores.
 '''
+from operator import itemgetter
 from cell import Cell
-from board import Board
 from move import Move
 from turn import Turn
 from piece import Piece
-from constants import BLACK, RED, EMPTY, KING_DIRECTIONS, BLACK_DIRECTIONS, RED_DIRECTIONS, SIZE
+from movegen import FULL_BOARD, NEAR_MASKS, DIRECTION_RANKS, \
+    generate_moves
+from constants import BLACK, RED, EMPTY, BLACK_DIRECTIONS, RED_DIRECTIONS, SIZE, \
+    NO_PIECE, NO_CAPTURE, OCC_BIT, KING_BIT, COLOR_BIT, RED_KING, BLACK_MAN, RED_MAN, \
+    MAN_CODES
 
 BLACK_KING_ROW = 7
 RED_KING_ROW = 0
+BLACK_END_ROW = 2
+RED_START_ROW = 5
+
+# 1 if a cell's background color should be dark, 0 otherwise, indexed
+# row * SIZE + col. A cell is dark when its row and col have the same parity.
+DARK = bytes(((row ^ col) & 1) ^ 1 for row in range(SIZE)
+             for col in range(SIZE))
+
+
+def start_code(row, col):
+    '''
+        Function -- start_code
+            Gets the piece code a location on the board starts the game with.
+        Parameters:
+            row -- The cell's row number
+            col -- The cell's column number
+        Returns:
+            The code of a black or red piece, or NO_PIECE
+    '''
+    if DARK[row * SIZE + col] or row > BLACK_END_ROW and row < RED_START_ROW:
+        return NO_PIECE
+    if row <= BLACK_END_ROW:
+        return BLACK_MAN
+    return RED_MAN
+
+
+# The key that sorts (rank, Move) pairs by rank alone
+BY_RANK = itemgetter(0)
+
+# The (row, col) location of each square index, shared by every Move
+LOCATIONS = tuple((row, col) for row in range(SIZE) for col in range(SIZE))
+
+# The piece code each square starts the game with, indexed row * SIZE + col
+START_CODES = bytes(start_code(row, col) for row in range(SIZE)
+                    for col in range(SIZE))
 
 class Game:
     '''
@@ -21,8 +60,15 @@ class Game:
             self -- the current Game object
             black_score -- black's current score
             red_score -- red's current score
-            board -- the game Board
-            status -- the current status of the game, a list of Cells
+            board -- the game Board, or None if the game is headless
+            status -- the current status of the game, a list of Cells. These
+            are a view of the board for the UI.
+            status_flat -- the same Cells in one tuple, indexed by
+            row * SIZE + col
+            board_arr -- the piece code of every square, indexed by
+            row * SIZE + col.
+            bitboards -- a bitboard of the squares holding each piece code,
+            indexed by code. Move generation reads the board from here.
             current_turn -- a Turn object representing the player whose turn it
             is and their possible moves
             black_possible_moves -- the possible Moves for the black player
@@ -37,17 +83,23 @@ class Game:
             advance_turn -- Advances to the next player's turn.
     '''
 
-    def __init__(self):
+    def __init__(self, headless=False):
         '''
             Constructor -- Creates a new instance of Game
             Parameter:
                 self -- The current Game object
+                headless -- True to play without a UI, e.g. for benchmarks or
+                AI self-play. No window is opened and board is None.
         '''
         self.new_game()
         self.black_score = 0
         self.red_score = 0
         self.winner = EMPTY
-        self.board = Board(self)
+        self.board = None
+        if not headless:
+            # Imported here so that headless games never load turtle and Tk
+            from board import Board
+            self.board = Board(self)
 
     def new_game(self):
         '''
@@ -58,31 +110,36 @@ class Game:
                 self -- The current Game object
         '''
         self.status = []
+        self.board_arr = bytearray(SIZE * SIZE)
+        self.bitboards = [0] * (RED_KING + 1)
+        self.bitboards[NO_PIECE] = FULL_BOARD
         # row, col starts in bottom left
         for row in range(SIZE):
             for col in range(SIZE):
                 if col == 0:
                     self.status.append([])
-                self.status[row].append(Cell(self.is_dark(row, col),
-                                             (row, col),
+                index = row * SIZE + col
+                self.status[row].append(Cell(DARK[index], (row, col),
                                              self.get_start_state(row, col)))
+                if START_CODES[index] != NO_PIECE:
+                    self.set_square(index, START_CODES[index])
+        self.status_flat = tuple(cell for row in self.status for cell in row)
         self.populate_valid_moves()
         self.current_turn = Turn(BLACK, self.black_possible_moves)
     
 
-    def is_dark(self, row, col):
+    def cell(self, row, col):
         '''
-            Method -- is_dark
-                Determines if a cell's background color should be dark based on
-                its location on the board.
+            Method -- cell
+                Gets the Cell at a location on the board.
             Parameters:
                 self -- The current Game object
                 row -- The cell's row number
                 col -- The cell's column number
             Returns:
-                True if the cell is dark, False otherwise
+                The Cell
         '''
-        return row % 2 == 0 and col % 2 == 0 or row % 2 == 1 and col % 2 == 1
+        return self.status_flat[row * SIZE + col]
 
     def get_start_state(self, row, col):
         '''
@@ -96,15 +153,28 @@ class Game:
             Returns:
                 Empty, a black Piece, or a red Piece
         '''
-        BLACK_START_ROW = 0
-        BLACK_END_ROW = 2
-        RED_START_ROW = 5
-        if self.is_dark(row, col) or row > BLACK_END_ROW and \
-           row < RED_START_ROW:
+        return self.piece_for_code(START_CODES[row * SIZE + col])
+
+    def piece_for_code(self, code):
+        '''
+            Method -- piece_for_code
+                Creates the Piece the UI shows for a board array code.
+            Parameters:
+                self -- The current Game object
+                code -- The piece code of a square
+            Returns:
+                Empty, or a black or red Piece that is crowned if the code
+                is a king
+        '''
+        if code == NO_PIECE:
             return EMPTY
-        if row >= BLACK_START_ROW and row <= BLACK_END_ROW:
-            return Piece(BLACK, BLACK_DIRECTIONS)
-        return Piece(RED, RED_DIRECTIONS)
+        if code & COLOR_BIT:
+            piece = Piece(RED, RED_DIRECTIONS)
+        else:
+            piece = Piece(BLACK, BLACK_DIRECTIONS)
+        if code & KING_BIT:
+            piece.make_king()
+        return piece
 
     def populate_valid_moves(self):
         '''
@@ -144,45 +214,62 @@ class Game:
                 moves. Each key is a piece location. Each value is a list of
                 Moves from the piece's location.
         '''
-        possible_moves = {}
-        pieces = self.all_cells_containing_color(piece_color)
-        for location in pieces:
-            moves = self.get_moves_for_piece(location, piece_color)
-            if len(moves) > 0:
-                possible_moves[location] = moves
-        return possible_moves
+        bitboards = self.bitboards
+        man = MAN_CODES[piece_color]
+        pieces = bitboards[man] | bitboards[man | KING_BIT]
+        return self.moves_by_piece(generate_moves(bitboards, pieces,
+                                                  piece_color))
 
-    def all_cells_containing_color(self, piece_color):
+    def moves_by_piece(self, generated):
         '''
-            Method -- all_cells_containing_color
-                Finds all cells that contain pieces of the given color.
+            Method -- moves_by_piece
+                Groups generated moves by the piece that makes them.
             Parameters:
                 self -- The current Game object
-                piece_color -- The color of the playing piece
+                generated -- A list of (start, end, captured) square indexes
             Returns:
-                A list of locations (tuples) containing pieces of the color.
-        '''
-        pieces = []
-        for row in range(len(self.status)):
-            for col in range(len(self.status[row])):
-                if self.status[row][col].contains_piece(piece_color):
-                    pieces.append((row, col))
-        return pieces
+                A dictionary of piece locations in board order. Each value is
+                a list of Moves from that location, capturing Moves first.
+                Within each piece, non-capturing Moves follow its
+                piece_directions and capturing Moves the reverse.
+        '''
+        captures = {}
+        others = {}
+        board_arr = self.board_arr
+        for start, end, captured in generated:
+            ranks = DIRECTION_RANKS[board_arr[start]]
+            move = Move(LOCATIONS[start], LOCATIONS[end], captured)
+            if captured != NO_CAPTURE:
+                # Captures go first, last direction first
+                captures.setdefault(start, []).append(
+                    (-ranks[captured - start], move))
+            else:
+                others.setdefault(start, []).append((ranks[end - start], move))
+        possible_moves = {}
+        for start in sorted(captures.keys() | others.keys()):
+            ranked = sorted(captures.get(start, []), key=BY_RANK) + \
+                     sorted(others.get(start, []), key=BY_RANK)
+            possible_moves[LOCATIONS[start]] = [move for rank, move in ranked]
+        return possible_moves
 
-    def get_next_cell_in_direction(self, start, direction):
+    def contains_piece(self, row, col, piece_color):
         '''
-            Method -- get_next_cell_in_direction
-                Gets the next location in a particular direction (up, left etc)
+            Method -- contains_piece
+                Checks if a location on the board contains a piece of the
+                given color.
             Parameters:
                 self -- The current Game object
-                start -- The start location
-                direction -- The direction to move in
+                row -- The cell's row number
+                col -- The cell's column number
+                piece_color -- The color of the playing piece
             Returns:
-                A tuple containing the next location
+                True if the location contains a piece of the given color,
+                False otherwise.
         '''
-        return (start[0] + direction[0], start[1] + direction[1])
+        return self.board_arr[row * SIZE + col] & (OCC_BIT | COLOR_BIT) == \
+            MAN_CODES[piece_color]
 
-    def get_moves_for_piece(self, cell_loc, piece_color):
+    def get_moves_for_piece(self, cell_loc, piece_color, captures_only=False):
         '''
             Method -- get_moves_for_piece
                 Gets all the valid Moves a piece can make. Capturing Moves are
@@ -191,52 +278,14 @@ class Game:
                 self -- The current Game object
                 cell_loc -- The start location
                 piece_color -- The color of the start piece.
+                captures_only -- True to get only the capturing Moves
             Returns:
                 A list of valid moves.
         '''
-        moves = []
-        cell = self.status[cell_loc[0]][cell_loc[1]]
-        for direction in cell.occupant.piece_directions:
-            next_loc = self.get_next_cell_in_direction(cell.location,
-                                                        direction)
-            move = self.create_move(cell.location, next_loc, direction,
-                                    piece_color)
-            if move is not None:
-                if move.is_capture():
-                    moves.insert(0, move)
-                else:
-                    moves.append(move)
-        return moves
-
-    
-    def create_move(self, start, next_cell, direction, piece_color):
-        '''
-            Method -- create_move
-                Creates a Move object if a move is possible from the start
-                cell and in the given direction.
-            Parameters:
-                self -- The current Game object
-                start -- The start location
-                next_cell -- The adjacent cell in the given direction
-                direction -- The direction to move in (for capturing moves)
-            Returns:
-                A Move, if one is available, or None if there isn't a valid
-                move in this direction.
-        '''
-        move = None
-        if not self.is_valid_cell(next_cell[0], next_cell[1]):
-            return move
-        # A non-capturing move
-        check_cell = self.status[next_cell[0]][next_cell[1]]
-        if check_cell.is_empty():
-            move = Move(start, next_cell, None)
-        # A possible capturing move
-        elif check_cell.occupant.is_enemy(piece_color):
-            end_loc = self.get_next_cell_in_direction(next_cell, direction)
-            if self.is_valid_cell(end_loc[0], end_loc[1]) and \
-               self.status[end_loc[0]][end_loc[1]].is_empty():
-                move = Move(start, end_loc, check_cell)
-        return move
+        piece = 1 << (cell_loc[0] * SIZE + cell_loc[1])
+        moves = self.moves_by_piece(generate_moves(self.bitboards, piece,
+                                                   piece_color, captures_only))
+        return moves.get(cell_loc, [])
 
 
     def get_additional_jump(self, start_cell, piece_color):
@@ -251,14 +300,8 @@ class Game:
             Returns:
                 A list of valid capturing moves.
         '''
-        possible_capture = []
-        moves = self.valid_moves_for_color(piece_color)
-        if start_cell.location in moves:
-            for move in moves[start_cell.location]:
-                if move.is_capture():
-                    possible_capture.append(move)
-                else:
-                    break
+        possible_capture = self.get_moves_for_piece(start_cell.location,
+                                                    piece_color, True)
         if len(possible_capture) == 0:
             self.current_turn.complete_turn()
         return possible_capture
@@ -273,45 +316,140 @@ class Game:
                 options -- A list of capturing Moves for the current piece
         '''
         self.current_turn.final_move = None
-        self.current_turn.possible_targets = options
-
-    def is_valid_cell(self, row, col):
-        '''
-            Method -- is_valid_cell
-                Checks if a row/col location is on the board.
-            Parameters:
-                self -- The current Game object
-                row -- The cell's row number
-                col -- The cell's column number
-            Returns:
-                True if the row/col is a cell
-        '''
-        return row >= 0 and row < SIZE and col >= 0 and col < SIZE
+        self.current_turn.set_targets(options)
 
     def update_state(self, move):
         '''
             Method -- update_state
                 Updates the game's status after a move. This updates the piece
-                locations, the scores, and upgrades the piece if necessary.
+                locations, the scores, both players' possible moves, and
+                upgrades the piece if necessary.
             Parameters:
                 self -- The current Game object
                 move -- The completed Move
         '''
-        new_cell = self.status[move.new_loc[0]][move.new_loc[1]]
-        old_cell = self.status[move.current_loc[0]][move.current_loc[1]]
+        board_arr = self.board_arr
+        status_flat = self.status_flat
+        set_square = self.set_square
+        row, col = move.new_loc
+        new_index = row * SIZE + col
+        old_index = move.current_loc[0] * SIZE + move.current_loc[1]
+        set_square(new_index, board_arr[old_index])
+        set_square(old_index, NO_PIECE)
+        new_cell = status_flat[new_index]
+        old_cell = status_flat[old_index]
         new_cell.occupant = old_cell.occupant
-        if move.new_loc[0] == BLACK_KING_ROW and new_cell.contains_piece(BLACK) \
-            or move.new_loc[0] == RED_KING_ROW and new_cell.contains_piece(RED):
+        if row == BLACK_KING_ROW and self.contains_piece(row, col, BLACK) \
+            or row == RED_KING_ROW and self.contains_piece(row, col, RED):
+            set_square(new_index, board_arr[new_index] | KING_BIT)
             new_cell.occupant.make_king()
         old_cell.occupant = EMPTY
-        if move.is_capture():
+        capturing = move.capturing
+        if capturing != NO_CAPTURE:
             if self.current_turn.player == BLACK:
                 self.black_score += 1
             else:
                 self.red_score += 1
-            move.capturing.occupant = EMPTY
+            set_square(capturing, NO_PIECE)
+            status_flat[capturing].occupant = EMPTY
+            self.recompute_moves_near((old_index, new_index, capturing))
+        else:
+            self.recompute_moves_near((old_index, new_index))
+
+    def recompute_moves_near(self, changed):
+        '''
+            Method -- recompute_moves_near
+                Updates both players' possible moves after a move. Only
+                pieces within two squares of a changed square can gain or lose
+                moves, so only their moves are generated again.
+            Parameters:
+                self -- The current Game object
+                changed -- The indexes of the squares that changed
+        '''
+        near = 0
+        for index in changed:
+            near |= NEAR_MASKS[index]
+        self.black_possible_moves = self.moves_updated_near(
+            self.black_possible_moves, near, BLACK)
+        self.red_possible_moves = self.moves_updated_near(
+            self.red_possible_moves, near, RED)
+
+    def moves_updated_near(self, possible_moves, near, piece_color):
+        '''
+            Method -- moves_updated_near
+                Regenerates the moves of one player's pieces on a set of
+                squares, keeping the moves of every other piece.
+            Parameters:
+                self -- The current Game object
+                possible_moves -- The player's possible moves before the change
+                near -- A bitboard of the squares to regenerate
+                piece_color -- The color of the player
+            Returns:
+                A new dictionary of the player's possible moves, in board
+                order.
+        '''
+        updated = {}
+        for location, moves in possible_moves.items():
+            if not near >> (location[0] * SIZE + location[1]) & 1:
+                updated[location] = moves
+        man = MAN_CODES[piece_color]
+        pieces = (self.bitboards[man] | self.bitboards[man | KING_BIT]) & near
+        updated.update(self.moves_by_piece(
+            generate_moves(self.bitboards, pieces, piece_color)))
+        return dict(sorted(updated.items()))
+
+    def set_square(self, index, code):
+        '''
+            Method -- set_square
+                Sets the piece code of a square, keeping the board array and
+                the bitboards in step.
+            Parameters:
+                self -- The current Game object
+                index -- The square index, row * SIZE + col
+                code -- The new piece code
+        '''
+        bit = 1 << index
+        self.bitboards[self.board_arr[index]] &= ~bit
+        self.bitboards[code] |= bit
+        self.board_arr[index] = code
 
 
+    def snapshot(self):
+        '''
+            Method -- snapshot
+                Captures the game state at the start of a turn so that moves
+                can be tried and then undone with restore.
+            Parameters:
+                self -- The current Game object
+            Returns:
+                A hashable tuple of the board array, both scores, the winner
+                and the player whose turn it is.
+        '''
+        return (bytes(self.board_arr), self.black_score, self.red_score,
+                self.winner, self.current_turn.player)
+
+    def restore(self, snap):
+        '''
+            Method -- restore
+                Puts the game back in a state captured by snapshot. Only the
+                squares that differ are rewritten.
+            Parameters:
+                self -- The current Game object
+                snap -- A tuple returned by snapshot
+        '''
+        board_arr, self.black_score, self.red_score, winner, player = snap
+        for index in range(SIZE * SIZE):
+            if self.board_arr[index] != board_arr[index]:
+                self.set_square(index, board_arr[index])
+                self.status_flat[index].occupant = \
+                    self.piece_for_code(board_arr[index])
+        self.populate_valid_moves()
+        self.winner = winner
+        if player == BLACK:
+            self.current_turn = Turn(BLACK, self.black_possible_moves)
+        else:
+            self.current_turn = Turn(RED, self.red_possible_moves)
+
     def advance_turn(self):
         '''
             Method -- advance_turn
@@ -319,7 +457,7 @@ class Game:
             Parameters:
                 self -- The current Game object
         '''
-        self.populate_valid_moves()
+        self.check_game_over()
         if self.current_turn.player == BLACK and \
            len(self.red_possible_moves) > 0: 
             self.current_turn = Turn(RED, self.red_possible_moves)
@@ -1,7 +1,8 @@
 from gamestate import Game
 
 def main():
-    Game()
+    game = Game()
+    game.board.run()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
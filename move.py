@@ -3,6 +3,8 @@ This module contains one class, Move, which represents a single valid Move for
 one piece. A single move means one location change. Capturing moves that take
 multiple pieces are represented as multiple Moves—-one per jump.
 '''
+from constants import NO_CAPTURE
+
 class Move:
     '''
         Class -- Move
@@ -11,7 +13,9 @@ class Move:
             self -- the current Move object
             current_loc -- the start cell
             new_loc -- the end cell
-            capturing -- stores a tuple of the captured location, if applicable
+            capturing -- the square index (row * SIZE + col) of the captured
+            piece, or NO_CAPTURE
+            capture -- True if this is a capturing move
         Methods:
             __init__ -- constructor
             is_capture -- checks if this is a capturing move
@@ -21,9 +25,10 @@ class Move:
         self.current_loc = current_loc
         self.new_loc = new_loc
         self.capturing = capturing
+        self.capture = capturing != NO_CAPTURE
 
     def is_capture(self):
-        return self.capturing is not None
+        return self.capture
 
     def __str__(self):
         if self.is_capture():
@@ -0,0 +1,165 @@
+'''
+This module contains the move generator. It works only on bitboards (ints
+with one bit per square, bit row * SIZE + col) so that it has no dependence on
+the Cell, Piece or Move objects used by the rest of the game.
+'''
+from constants import KING_DIRECTIONS, BLACK_DIRECTIONS, RED_DIRECTIONS, SIZE, \
+    NO_PIECE, NO_CAPTURE, KING_BIT, MAN_CODES, BLACK_MAN, BLACK_KING, \
+    RED_MAN, RED_KING
+
+# The directions an uncrowned piece can move in, indexed by color
+FORWARD_DIRECTIONS = (BLACK_DIRECTIONS, RED_DIRECTIONS)
+
+# A bitboard with every square set
+FULL_BOARD = (1 << SIZE * SIZE) - 1
+
+
+def columns_mask(cols):
+    '''
+        Function -- columns_mask
+            Builds a bitboard with every square in the given columns set.
+        Parameters:
+            cols -- the columns to include
+        Returns:
+            The bitboard
+    '''
+    mask = 0
+    for row in range(SIZE):
+        for col in cols:
+            mask |= 1 << (row * SIZE + col)
+    return mask
+
+
+def direction_masks(direction):
+    '''
+        Function -- direction_masks
+            Gets the bit shift for one step in a direction, and the squares
+            a piece can step or jump from in that direction without going off
+            the side of the board.
+        Parameters:
+            direction -- the (row, col) direction
+        Returns:
+            A tuple of the shift, the step-from mask and the jump-from mask
+    '''
+    if direction[1] > 0:
+        step_cols, jump_cols = range(SIZE - 1), range(SIZE - 2)
+    else:
+        step_cols, jump_cols = range(1, SIZE), range(2, SIZE)
+    return (direction[0] * SIZE + direction[1], columns_mask(step_cols),
+            columns_mask(jump_cols))
+
+
+DIRECTION_MASKS = {direction: direction_masks(direction)
+                   for direction in KING_DIRECTIONS}
+
+
+def near_mask(index):
+    '''
+        Function -- near_mask
+            Builds a bitboard of the squares within two rows and columns of a
+            square. These are the only pieces whose moves can change when the
+            square does.
+        Parameters:
+            index -- the square index, row * SIZE + col
+        Returns:
+            The bitboard
+    '''
+    row, col = divmod(index, SIZE)
+    mask = 0
+    for near_row in range(max(row - 2, 0), min(row + 3, SIZE)):
+        for near_col in range(max(col - 2, 0), min(col + 3, SIZE)):
+            mask |= 1 << (near_row * SIZE + near_col)
+    return mask
+
+
+def direction_ranks(directions):
+    '''
+        Function -- direction_ranks
+            Numbers the one-square steps of a piece in the order of its
+            directions.
+        Parameters:
+            directions -- the piece's (row, col) directions
+        Returns:
+            A dictionary from each step, in squares, to its position in
+            directions
+    '''
+    return {direction[0] * SIZE + direction[1]: rank
+            for rank, direction in enumerate(directions)}
+
+
+# The rank of each step in a piece's own direction order, indexed by piece
+# code. Moves are listed in this order so that every piece's moves come out
+# as they would from walking its piece_directions.
+DIRECTION_RANKS = {BLACK_MAN: direction_ranks(BLACK_DIRECTIONS),
+                   BLACK_KING: direction_ranks(KING_DIRECTIONS),
+                   RED_MAN: direction_ranks(RED_DIRECTIONS),
+                   RED_KING: direction_ranks(KING_DIRECTIONS)}
+
+
+NEAR_MASKS = tuple(near_mask(index) for index in range(SIZE * SIZE))
+
+
+def shift(bits, amount):
+    '''
+        Function -- shift
+            Shifts a bitboard by a number of squares. Bits shifted off the
+            top or bottom of the board are dropped.
+        Parameters:
+            bits -- the bitboard
+            amount -- the number of squares, positive to move up the board
+        Returns:
+            The shifted bitboard
+    '''
+    if amount > 0:
+        return (bits << amount) & FULL_BOARD
+    return bits >> -amount
+
+
+def squares(bits):
+    '''
+        Function -- squares
+            Iterates over the set bits of a bitboard, lowest first.
+        Parameters:
+            bits -- the bitboard
+        Returns:
+            A generator of square indexes
+    '''
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+def generate_moves(bitboards, movers, piece_color, captures_only=False):
+    '''
+        Function -- generate_moves
+            Finds the moves for a set of pieces of one color. Each
+            direction is handled for all the pieces at once by shifting
+            bitboards.
+        Parameters:
+            bitboards -- The game's bitboards, indexed by piece code
+            movers -- A bitboard of the pieces to move
+            piece_color -- The color of the pieces
+            captures_only -- True to skip the non-capturing moves
+        Returns:
+            A list of (start, end, captured) square indexes. The captured
+            index is NO_CAPTURE for a non-capturing move.
+    '''
+    man = MAN_CODES[piece_color]
+    enemy = MAN_CODES[1 - piece_color]
+    men = bitboards[man] & movers
+    kings = bitboards[man | KING_BIT] & movers
+    enemies = bitboards[enemy] | bitboards[enemy | KING_BIT]
+    empty = bitboards[NO_PIECE]
+    forward = FORWARD_DIRECTIONS[piece_color]
+    moves = []
+    for direction in KING_DIRECTIONS:
+        step, step_from, jump_from = DIRECTION_MASKS[direction]
+        pieces = kings | men if direction in forward else kings
+        if not captures_only:
+            for end in squares(shift(pieces & step_from, step) & empty):
+                moves.append((end - step, end, NO_CAPTURE))
+        jumped = shift(pieces & jump_from, step) & enemies
+        for end in squares(shift(jumped, step) & empty):
+            moves.append((end - 2 * step, end, end - step))
+    return moves
@@ -10,14 +10,15 @@ class Piece:
             Represents a game piece.
         Attributes:
             self -- the current Piece object
-            color -- the piece's color
-            piece_directions -- a list of directions that the piece can move in
+            color -- the piece's color, BLACK or RED (0 or 1)
+            piece_directions -- a tuple of directions that the piece can move
+            in. This is one of the shared direction constants, never a copy.
             is_king -- True if the piece is a king, False otherwise.
         Methods:
             __init__ -- constructor
-            is_enemy -- Checks if this Piece is a player's enemy
             make_king -- Converts this Piece into a king
     '''
+    __slots__ = ("color", "piece_directions", "is_king")
 
 
     def __init__(self, color, piece_directions):
@@ -26,29 +27,14 @@ class Piece:
             Parameter:
                 self -- The current Piece object
                 color -- The Piece's color.
-                piece_directions -- A list of tuples storing the directions
-                that the piece can move in.
+                piece_directions -- A tuple of tuples storing the directions
+                that the piece can move in, e.g. BLACK_DIRECTIONS.
         '''
         self.color = color
         self.piece_directions = piece_directions
         self.is_king = False
 
 
-    def is_enemy(self, player):
-        '''
-            Method -- is_enemey
-                Checks if this piece is the enemy of the given player. E.g. if
-                this piece is black and player is red, then this piece is the
-                enemy.
-            Parameters:
-                self -- The current Piece object
-                player -- The color of the other piece.
-            Returns:
-                True if this piece is the enemy of player, False otherwise.
-        '''
-        return self.color is not player
-
-
     def make_king(self):
         '''
             Method -- make_king
@@ -5,6 +5,7 @@ current turn.
 from constants import NEW_TURN, VALID_PIECE_SELECTED, CHECK_MULTIPLE_JUMPS, \
                       MOVE_COMPLETE
 import random
+import array
 
 class Turn:
     '''
@@ -16,10 +17,18 @@ class Turn:
             step -- the stage of the turn e.g. new turn, capture required
             valid_moves -- a dictionary of all possible valid moves for this
             player
+            move_keys -- the locations in valid_moves, as a tuple
+            first_is_capture -- a packed array holding 1 for each location in
+            move_keys whose first Move captures, 0 otherwise
             capture_required -- a boolean indicating if a capture is required.
             This is True if a capture is possible.
+            first_capture_loc -- the first location in valid_moves that can
+            capture, or None
+            post_move_step -- the step a move leads to: checking for more
+            jumps if this turn captures, otherwise complete
             possible_targets -- populated after a Piece is selected, a list of
-            all valid Moves for that Piece. 
+            all valid Moves for that Piece.
+            target_by_loc -- the possible_targets keyed by their end location
             final_move -- the Move that is actually made.
         Methods:
             __init__ -- constructor
@@ -42,8 +51,19 @@ class Turn:
         self.player = player
         self.step = NEW_TURN
         self.valid_moves = valid_moves
-        self.capture_required = self.is_capture_required()
+        self.move_keys = tuple(valid_moves)
+        # Whether each piece's first Move captures, in move_keys order
+        self.first_is_capture = array.array(
+            "b", [moves[0].capture for moves in valid_moves.values()])
+        self.capture_required = 1 in self.first_is_capture
+        self.first_capture_loc = None
+        if self.capture_required:
+            self.first_capture_loc = \
+                self.move_keys[self.first_is_capture.index(1)]
+        self.post_move_step = CHECK_MULTIPLE_JUMPS if self.capture_required \
+                              else MOVE_COMPLETE
         self.possible_targets = []
+        self.target_by_loc = {}
         self.final_move = None
 
 
@@ -57,34 +77,9 @@ class Turn:
                 True if the dictionary of valid_moves contains a capturing
                 Move, False otherwise.
         '''
-        for piece in self.valid_moves:
-            if self.valid_moves[piece][0].is_capture():
-                return True
-        return False
-
+        return self.capture_required
 
-    def playable_cell_selected(self, cell_clicked):
-        '''
-            Method -- playable_cell_selected
-                Checks if the selected cell is "playable". If the turn has
-                just begun (no piece has been chosen), the cell must contain
-                one of the current player's pieces. If a turn has begun (a
-                piece has been chosen), the clicked cell must be a valid target
-                for the chosen piece. TODO allow the user to change their mind
-                and select a different piece to move
-            Parameters:
-                self -- The current Turn object
-                cell_clicked - The cell clicked by the user
-            Returns:
-                True if the cell is playable, False otherwise.
-        '''
-        if self.step == NEW_TURN:
-            return cell_clicked in self.valid_moves
-        elif not self.is_turn_complete():
-            return self.find_clicked_target(cell_clicked) is not None
-        return False
 
-  
     def find_clicked_target(self, cell_clicked):
         '''
             Method -- find_clicked_target
@@ -97,10 +92,7 @@ class Turn:
                 The target Cell if found or None if the clicked cell is not a
                 valid target.
         '''
-        for target in self.possible_targets:
-            if cell_clicked == target.new_loc:
-                return target
-        return None
+        return self.target_by_loc.get(cell_clicked)
 
 
     def is_valid_turn(self, cell_clicked):
@@ -116,36 +108,40 @@ class Turn:
                 True if cell will allow the player to make a Turn meeting the
                 requirements.
         '''
-        if not self.playable_cell_selected(cell_clicked):
-            return False
         if self.step == NEW_TURN:
-            if self.allowed_start_piece(cell_clicked):
+            moves = self.valid_moves.get(cell_clicked)
+            if moves is None:
+                return False
+            if self.allowed_start_piece(moves):
                 self.finish_initial_selection(cell_clicked)
                 return True
-        target = self.find_clicked_target(cell_clicked)
-        if target is not None and (target.is_capture() or not 
-                                   self.is_capture_required()):
-            self.finish_piece_move(target)
-            return True
+        elif not self.is_turn_complete():
+            # Look the target up once and use it for both checks
+            target = self.find_clicked_target(cell_clicked)
+            if target is None:
+                return False
+            if target.capture or not self.capture_required:
+                self.finish_piece_move(target)
+                return True
+        else:
+            return False
         print("A capture is possible... piece MUST be captured!")
         return False
 
     
-    def allowed_start_piece(self, cell_clicked):
+    def allowed_start_piece(self, moves):
         '''
             Method -- allowed_start_piece
                 Helper method called when the user selects a piece to move.
                 Checks if the selected piece meets requirements.
             Parameters:
                 self -- The current Turn object
-                cell_clicked -- The cell clicked (or selected)
+                moves -- The valid Moves of the selected piece
             Returns:
                 True if the selected piece is allowed, False otherwise.
         '''
-        return not self.is_capture_required() or \
-               self.is_capture_required() and \
-               self.valid_moves[cell_clicked][0].is_capture()
-               
+        return not self.capture_required or moves[0].capture
+
 
     def finish_initial_selection(self, start_loc):
         '''
@@ -156,8 +152,21 @@ class Turn:
                 self -- the current Turn object
                 start_loc -- The cell containing the selected piece
         '''
-        self.step += 1
-        self.possible_targets = self.valid_moves[start_loc]
+        self.step = VALID_PIECE_SELECTED
+        self.set_targets(self.valid_moves[start_loc])
+
+
+    def set_targets(self, targets):
+        '''
+            Method -- set_targets
+                Sets the Moves the selected piece can make, indexing them by
+                their end location for click lookups.
+            Parameters:
+                self -- the current Turn object
+                targets -- A list of Moves for the selected piece
+        '''
+        self.possible_targets = targets
+        self.target_by_loc = {target.new_loc: target for target in targets}
 
 
     def finish_piece_move(self, move):
@@ -169,8 +178,7 @@ class Turn:
                 self -- the current Turn object
                 move -- The Move that is being made
         '''
-        self.step = CHECK_MULTIPLE_JUMPS if self.capture_required \
-                    else MOVE_COMPLETE
+        self.step = self.post_move_step
         self.final_move = move
 
 
@@ -208,13 +216,9 @@ class Turn:
         loc = None
         if self.step == NEW_TURN:
             if self.capture_required:
-                for location in self.valid_moves:
-                    if self.valid_moves[location][0].is_capture():
-                        loc = location
-                        break
+                loc = self.first_capture_loc
             else:
-                key_loc = random.randint(0, len(self.valid_moves) - 1)
-                loc = list(self.valid_moves.keys())[key_loc]
+                loc = random.choice(self.move_keys)
             self.finish_initial_selection(loc)
         elif self.step == VALID_PIECE_SELECTED or self.step == CHECK_MULTIPLE_JUMPS:
             loc = self.possible_targets[0].new_loc